@@ -0,0 +1,251 @@
+"""
+Approximate Queries
+Fast approximate versions of the heavy report queries for interactive use.
+
+Whole orders are sampled with TABLESAMPLE BERNOULLI (see the *_sample queries
+in query_registry.py) and collapsed in SQL to one row per group and order, so
+COUNT(DISTINCT order_id) is the number of streamed rows of a group and needs no
+distinct-count sketch. The rows are streamed through Space-Saving for top-N
+groups.
+Every estimate is returned with a 95% error bound in a `<column>_err` column.
+
+Usage:
+    python approximate.py top_categories_by_orders --pct 2
+    python approximate.py --benchmark --pct 1 5 10
+"""
+
+import argparse
+import math
+import sys
+import time
+from collections import namedtuple
+
+from query_registry import QueryRunner, write_results
+
+Z_95 = 1.96
+
+
+# ------------------ Sketches ------------------
+class SpaceSaving:
+    """Top-N heavy hitters in bounded memory (Metwally et al.).
+
+    Each monitored item carries a payload created by `factory`. When the
+    table is full the least-counted item is evicted and the newcomer inherits
+    its count as `error`, so an item's true count lies in [count - error, count].
+    capacity=None keeps every item (exact).
+    """
+
+    def __init__(self, capacity=None, factory=dict):
+        self.capacity = capacity
+        self.factory = factory
+        self.items = {}  # item -> [count, error, payload]
+
+    def add(self, item, weight=1):
+        entry = self.items.get(item)
+        if entry is None:
+            if self.capacity is not None and len(self.items) >= self.capacity:
+                victim = min(self.items, key=lambda k: self.items[k][0])
+                floor = self.items.pop(victim)[0]
+            else:
+                floor = 0
+            entry = self.items[item] = [floor, floor, self.factory()]
+        entry[0] += weight
+        return entry[2]
+
+    def top(self, n=None):
+        ranked = sorted(self.items.items(), key=lambda kv: kv[1][0], reverse=True)
+        return [(item, count, error, payload) for item, (count, error, payload) in ranked[:n]]
+
+
+class ClusterStats:
+    """Row count and value total of a group, accumulated one sampled order at a time.
+
+    Sampling keeps or drops whole orders, so an order (with all of its item,
+    payment and joined rows) is the sampling unit and the variances below are
+    taken over per-order totals rather than over rows.
+    """
+
+    def __init__(self):
+        self.orders = 0
+        self.rows = 0
+        self.total = 0.0
+        self.rows_sq = 0.0
+        self.total_sq = 0.0
+        self.cross = 0.0  # sum of rows * total per order
+
+    def add(self, rows, total):
+        rows, total = int(rows), float(total or 0)
+        self.orders += 1
+        self.rows += rows
+        self.total += total
+        self.rows_sq += rows * rows
+        self.total_sq += total * total
+        self.cross += rows * total
+
+
+# ------------------ Estimators ------------------
+# rate = fraction of orders sampled. Bounds are 95% normal intervals for
+# Bernoulli cluster sampling: each order contributes its row count n and value
+# total y, and Var(sum(y) / rate) is estimated by (1 - rate) * sum(y^2) / rate^2.
+# A join that repeats an order's rows (e.g. one row per geolocation point of the
+# seller's zip prefix) inflates y, and with it the bound, as it should.
+def estimate_count(stats, rate, missed=0):
+    """Scale a sampled row count; `missed` is the Space-Saving error in rows."""
+    se = math.sqrt((1 - rate) * stats.rows_sq) / rate
+    return stats.rows / rate, Z_95 * se + missed / rate
+
+
+def estimate_orders(stats, rate, missed=0):
+    """Scale the exact number of sampled orders; `missed` as in estimate_count."""
+    se = math.sqrt(stats.orders * (1 - rate)) / rate
+    return stats.orders / rate, Z_95 * se + missed / rate
+
+
+def estimate_sum(stats, rate):
+    se = math.sqrt((1 - rate) * stats.total_sq) / rate
+    return stats.total / rate, Z_95 * se
+
+
+def estimate_mean(stats, rate):
+    """Per-row mean as the ratio total / rows (linearized ratio-estimator variance)."""
+    if stats.rows == 0:
+        return None, None
+    ratio = stats.total / stats.rows
+    # sum over orders of (y - ratio * n)^2
+    residual = stats.total_sq - 2 * ratio * stats.cross + ratio * ratio * stats.rows_sq
+    return ratio, Z_95 * math.sqrt((1 - rate) * max(residual, 0.0)) / stats.rows
+
+
+# ------------------ Approximate queries ------------------
+# sample: registry query returning one (group, order_id, rows, total) row per
+#   group and sampled order, i.e. the order's row count and value total
+# columns: (output column, estimator) pairs; estimators are
+#   'orders' distinct orders, 'rows' row count, 'sum' / 'avg' of value
+# top: keep only the N largest groups by the first column (None = all groups)
+Approx = namedtuple('Approx', ['sample', 'group', 'columns', 'top'])
+
+APPROXIMATE = {
+    'top_categories_by_orders': Approx(
+        'top_categories_by_orders_sample', 'product_category_name',
+        [('total_orders', 'orders'), ('avg_price', 'avg')], top=10),
+    'payments_by_state': Approx(
+        'payments_by_state_sample', 'customer_state',
+        [('total_payment', 'sum'), ('num_payments', 'rows'), ('avg_payment', 'avg')], top=None),
+    'state_orders_sales': Approx(
+        'state_orders_sales_sample', 'state',
+        [('total_orders', 'orders'), ('total_sales', 'sum'), ('avg_order_value', 'avg')], top=None),
+}
+
+
+def _estimate(kind, stats, rate, missed):
+    if kind == 'orders':
+        return estimate_orders(stats, rate, missed)
+    if kind == 'rows':
+        return estimate_count(stats, rate, missed)
+    if kind == 'sum':
+        return estimate_sum(stats, rate)
+    return estimate_mean(stats, rate)
+
+
+def approximate(runner, name, pct=1.0, seed=42, limit=None):
+    """Approximate a registry query from a `pct` percent sample of orders.
+
+    Returns (columns, rows) like QueryRunner.fetch, with a `<column>_err`
+    95% bound after every estimated column.
+    """
+    if not 0 < pct <= 100:
+        raise ValueError(f"pct must be in (0, 100], got {pct}")
+    spec = APPROXIMATE[name]
+    rate = pct / 100.0
+    limit = limit if limit is not None else spec.top
+    # a few times more counters than reported rows keeps the top-N stable
+    sketches = SpaceSaving(capacity=4 * limit if limit else None, factory=ClusterStats)
+    for group, _order_id, n_rows, total in runner.stream(spec.sample, pct=pct, seed=seed):
+        sketches.add(group, weight=max(n_rows, 1)).add(n_rows, total)
+
+    rows = []
+    for group, _count, missed, stats in sketches.top():
+        row = [group]
+        for _column, kind in spec.columns:
+            row.extend(_estimate(kind, stats, rate, missed))
+        rows.append(tuple(row))
+    rows.sort(key=lambda r: r[1], reverse=True)
+
+    columns = [spec.group]
+    for column, _kind in spec.columns:
+        columns += [column, f"{column}_err"]
+    return columns, rows[:limit] if limit else rows
+
+
+# ------------------ Benchmark ------------------
+def _accuracy(spec, exact_columns, exact_rows, approx_rows):
+    """Median relative error of the first estimated column, and top-N recall."""
+    column = spec.columns[0][0]
+    exact = {r[0]: float(r[exact_columns.index(column)]) for r in exact_rows}
+    errors = [abs(r[1] - exact[r[0]]) / exact[r[0]] for r in approx_rows if exact.get(r[0])]
+    errors.sort()
+    median = errors[len(errors) // 2] if errors else float('nan')
+    if spec.top:
+        top_exact = sorted(exact, key=exact.get, reverse=True)[:spec.top]
+        recall = len(set(top_exact) & {r[0] for r in approx_rows}) / len(top_exact)
+    else:
+        recall = len({r[0] for r in approx_rows} & set(exact)) / len(exact)
+    return median, recall
+
+
+def benchmark(names, pcts, repeat=3, seed=42):
+    print(f"{'query':26} {'mode':>8} {'seconds':>9} {'speedup':>8} {'med.err':>8} {'recall':>7}")
+    with QueryRunner() as runner:
+        for name in names:
+            spec = APPROXIMATE[name]
+            runner.fetch(name)  # warm-up: prepares the statement and fills the cache
+            exact_time = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                exact_columns, exact_rows = runner.fetch(name)
+                exact_time = min(exact_time, time.perf_counter() - start)
+            if spec.top:
+                # the exact query is LIMITed; compare against the full ranking
+                exact_columns, exact_rows = runner.fetch(name, limit=1000000)
+            print(f"{name:26} {'exact':>8} {exact_time:9.3f}")
+
+            for pct in pcts:
+                approx_time = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    _columns, approx_rows = approximate(runner, name, pct=pct, seed=seed)
+                    approx_time = min(approx_time, time.perf_counter() - start)
+                median, recall = _accuracy(spec, exact_columns, exact_rows, approx_rows)
+                print(f"{'':26} {f'{pct:g}%':>8} {approx_time:9.3f} {exact_time / approx_time:7.1f}x "
+                      f"{median:8.2%} {recall:7.0%}")
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Approximate report queries with error bounds.")
+    parser.add_argument('names', nargs='*', help=f"queries (default: all of {', '.join(APPROXIMATE)})")
+    parser.add_argument('--pct', type=float, nargs='+', default=[1.0], help="percent of orders to sample")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--limit', type=int, help="top-N groups to report")
+    parser.add_argument('-f', '--format', choices=['table', 'csv', 'json'], default='table')
+    parser.add_argument('--benchmark', action='store_true', help="compare exact vs approximate latency and accuracy")
+    return parser
+
+
+def run(args):
+    names = args.names or list(APPROXIMATE)
+    unknown = [n for n in names if n not in APPROXIMATE]
+    if unknown:
+        print(f"No approximate mode for: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    if args.benchmark:
+        benchmark(names, args.pct, seed=args.seed)
+        return 0
+
+    with QueryRunner() as runner:
+        results = [(name, *approximate(runner, name, args.pct[0], args.seed, args.limit)) for name in names]
+    write_results(results, args.format)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run(build_parser().parse_args()))
@@ -0,0 +1,196 @@
+"""
+Olist Analytics CLI
+One entry point for every report and chart. Each subcommand imports only the
+libraries it needs, so a cron job that refreshes one chart does not pay for
+pandas + matplotlib + plotly + open3d up front.
+
+Usage:
+    python cli.py report
+    python cli.py query top_sellers late_deliveries --param limit=3
+    python cli.py approx payments_by_state --pct 2
+    python cli.py distance
+    python cli.py customers update
+    python cli.py chart top_sellers payment_histogram --no-show
+    python cli.py excel
+    python cli.py bench-startup
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+# Libraries that must not be loaded just by importing the CLI or the report modules
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'plotly', 'sqlalchemy', 'psycopg2', 'open3d')
+
+REPORT_MODULES = ('main', 'query_registry', 'approximate', 'export_to_excel', 'visualisations', 'ployk',
+                  'geo_distance', 'customer_analytics', 'assignment5')
+
+
+def charts():
+    """Chart name -> function taking (runner, show=...): visualisations.CHARTS plus
+    the charts that live in other modules."""
+    import customer_analytics
+    import ployk
+    import visualisations
+    return {**visualisations.CHARTS,
+            'department_slider': ployk.monthly_department_slider,
+            'cohort_retention': customer_analytics.retention_heatmap}
+
+
+# ------------------ Subcommands ------------------
+def cmd_report(args):
+    import main
+    main.main()
+    return 0
+
+
+def cmd_query(args):
+    import query_registry
+    return query_registry.run(args)
+
+
+def cmd_approx(args):
+    import approximate
+    return approximate.run(args)
+
+
+def cmd_distance(args):
+    import geo_distance
+    return geo_distance.run(args)
+
+
+def cmd_customers(args):
+    import customer_analytics
+    return customer_analytics.run(args)
+
+
+def cmd_chart(args):
+    available = charts()
+    unknown = [n for n in args.names if n not in available]
+    if unknown:
+        print(f"Unknown chart: {', '.join(unknown)} (choose from {', '.join(available)})", file=sys.stderr)
+        return 2
+    from query_registry import QueryRunner
+    with QueryRunner() as runner:
+        for name in args.names or available:
+            path = available[name](runner, show=not args.no_show)
+            if isinstance(path, str):
+                print(f"Chart saved: {path}")
+    return 0
+
+
+def cmd_excel(args):
+    import export_to_excel
+    from query_registry import QueryRunner
+    with QueryRunner() as runner:
+        path = export_to_excel.export(runner, args.output, args.sheet or None)
+    print(f"Excel file created: {path}")
+    return 0
+
+
+def cmd_mesh(args):
+    import assignment5
+    assignment5.main(args.path or assignment5.FILE_PATH)
+    return 0
+
+
+# ------------------ Startup benchmark ------------------
+STARTUP_CASES = [
+    ('eager imports (old scripts)', "import pandas, numpy, matplotlib.pyplot, plotly.express, sqlalchemy"),
+    ('import report modules', "import " + ", ".join(REPORT_MODULES)),
+    ('cli.py --help', None),
+]
+
+
+def _time_command(argv, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if result.returncode != 0:
+            return None
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[0], timings[len(timings) // 2]
+
+
+def heavy_modules_loaded():
+    """Heavy libraries present in sys.modules after importing every report module."""
+    import importlib
+    for module in REPORT_MODULES:
+        importlib.import_module(module)
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+
+def cmd_bench_startup(args):
+    print(f"{'case':32} {'best ms':>9} {'median ms':>10}")
+    for label, code in STARTUP_CASES:
+        argv = [sys.executable, __file__, '--help'] if code is None else [sys.executable, '-c', code]
+        timing = _time_command(argv, args.repeat)
+        if timing is None:
+            print(f"{label:32} {'n/a (import failed)':>20}")
+        else:
+            print(f"{label:32} {timing[0] * 1000:9.1f} {timing[1] * 1000:10.1f}")
+    loaded = heavy_modules_loaded()
+    print(f"\nHeavy modules loaded by importing the reports: {', '.join(loaded) or 'none'}")
+    return 1 if loaded else 0
+
+
+# ------------------ Parser ------------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Olist e-commerce analytics reports and charts.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('report', help="print the main query report (main.py)")
+    p.set_defaults(func=cmd_report)
+
+    import query_registry
+    p = sub.add_parser('query', help="run selected registry queries")
+    query_registry.build_parser(p)
+    p.set_defaults(func=cmd_query)
+
+    import approximate
+    p = sub.add_parser('approx', help="approximate aggregate queries with error bounds")
+    approximate.build_parser(p)
+    p.set_defaults(func=cmd_approx)
+
+    import geo_distance
+    p = sub.add_parser('distance', help="freight and delivery delay vs seller-customer distance")
+    geo_distance.build_parser(p)
+    p.set_defaults(func=cmd_distance)
+
+    import customer_analytics
+    p = sub.add_parser('customers', help="customer RFM and cohort retention (incremental)")
+    customer_analytics.build_parser(p)
+    p.set_defaults(func=cmd_customers)
+
+    p = sub.add_parser('chart', help="draw charts (default: all)")
+    p.add_argument('names', nargs='*', metavar='NAME', help=f"one of: {', '.join(charts())}")
+    p.add_argument('--no-show', action='store_true', help="only save the PNGs, do not open windows")
+    p.set_defaults(func=cmd_chart)
+
+    import export_to_excel
+    p = sub.add_parser('excel', help="export chart data to Excel")
+    p.add_argument('--output', help="workbook path (default: exports/charts_data.xlsx)")
+    p.add_argument('--sheet', action='append', choices=[*export_to_excel.SHEETS, *export_to_excel.CUSTOMER_SHEETS],
+                   help="sheet to export (repeatable; default: all)")
+    p.set_defaults(func=cmd_excel)
+
+    p = sub.add_parser('mesh', help="3D model processing demo (assignment5.py)")
+    p.add_argument('path', nargs='?', help="OBJ file to load")
+    p.set_defaults(func=cmd_mesh)
+
+    p = sub.add_parser('bench-startup', help="measure import/startup time")
+    p.add_argument('--repeat', type=int, default=5)
+    p.set_defaults(func=cmd_bench_startup)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
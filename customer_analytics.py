@@ -0,0 +1,400 @@
+"""
+Customer Analytics
+Recency / frequency / monetary (RFM) features and a cohort-retention matrix
+keyed by first-purchase month, maintained incrementally.
+
+State is a set of numpy arrays with one slot per customer_unique_id plus a
+cohort x months-since-first-purchase matrix, saved to a compressed .npz file.
+`update()` folds in only the months not yet processed, so a monthly refresh
+reads one month of orders instead of the full history.
+
+Usage:
+    python customer_analytics.py update              # fold in new complete months
+    python customer_analytics.py rfm --limit 20
+    python customer_analytics.py retention
+    python customer_analytics.py check               # incremental == one-shot, on synthetic orders
+
+The monthly reads filter orders on order_purchase_timestamp; create its index
+once with `python query_registry.py --create-indexes`.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from query_registry import QueryRunner
+
+# numpy / pandas / matplotlib are imported inside the functions (see cli.py).
+
+STATE_PATH = os.path.join("state", "customer_analytics.npz")
+
+
+def state_file(path):
+    """The file save() writes for `path` (np.savez adds .npz when it is missing)."""
+    return path if path.endswith('.npz') else path + '.npz'
+
+
+def month_index(month):
+    """'YYYY-MM' -> months since year 0, so consecutive months differ by 1."""
+    year, mon = month.split('-')
+    return int(year) * 12 + int(mon) - 1
+
+
+def month_label(index):
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def month_bounds(index):
+    """First day of the month and of the next month, as 'YYYY-MM-DD'."""
+    return f"{month_label(index)}-01", f"{month_label(index + 1)}-01"
+
+
+class CustomerAnalytics:
+    """Array-backed per-customer RFM state and cohort retention counts."""
+
+    def __init__(self):
+        import numpy as np
+        self.index = {}  # customer_unique_id -> slot in the arrays below
+        self.ids = []
+        self.first_ts = np.zeros(0, dtype=np.int64)   # epoch seconds
+        self.last_ts = np.zeros(0, dtype=np.int64)
+        self.frequency = np.zeros(0, dtype=np.int32)  # orders
+        self.monetary = np.zeros(0, dtype=np.float64)  # total payments
+        self.cohort = np.zeros(0, dtype=np.int32)      # month_index of first purchase
+        # retention[c, k] = customers of cohort first_month + c active k months later
+        self.retention = np.zeros((0, 0), dtype=np.int32)
+        self.first_month = None
+        self.last_month = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ------------------ State growth ------------------
+    def _slots(self, customer_ids):
+        """Array slot per customer id, registering new customers."""
+        import numpy as np
+        slots = np.empty(len(customer_ids), dtype=np.int64)
+        for i, cid in enumerate(customer_ids):
+            slot = self.index.get(cid)
+            if slot is None:
+                slot = self.index[cid] = len(self.ids)
+                self.ids.append(cid)
+            slots[i] = slot
+        needed = len(self.ids)
+        if needed > len(self.frequency):
+            capacity = max(needed, 2 * len(self.frequency), 1024)
+            for name in ('first_ts', 'last_ts', 'frequency', 'monetary', 'cohort'):
+                old = getattr(self, name)
+                new = np.zeros(capacity, dtype=old.dtype)
+                new[:len(old)] = old
+                setattr(self, name, new)
+        return slots
+
+    def _grow_retention(self, month):
+        import numpy as np
+        size = month - self.first_month + 1
+        if size > self.retention.shape[0]:
+            new = np.zeros((size, size), dtype=np.int32)
+            rows, cols = self.retention.shape
+            new[:rows, :cols] = self.retention
+            self.retention = new
+
+    # ------------------ Incremental update ------------------
+    def fold_month(self, month, customer_ids, purchased_at, order_values):
+        """Add one month of orders. Months must be folded in order, each once."""
+        import numpy as np
+        month = month_index(month) if isinstance(month, str) else month
+        if self.last_month is not None and month <= self.last_month:
+            raise ValueError(f"{month_label(month)} already folded (state is at {month_label(self.last_month)})")
+        if self.first_month is None:
+            self.first_month = month
+        self._grow_retention(month)
+        self.last_month = month
+        if len(customer_ids) == 0:
+            return 0
+
+        slots = self._slots(customer_ids)
+        ts = np.asarray(purchased_at, dtype='datetime64[s]').astype(np.int64)
+        values = np.asarray(order_values, dtype=np.float64)
+
+        # collapse the month's orders to one entry per customer
+        customers, inverse = np.unique(slots, return_inverse=True)
+        orders = np.bincount(inverse).astype(np.int32)
+        spent = np.bincount(inverse, weights=values)
+        first = np.full(len(customers), np.iinfo(np.int64).max)
+        last = np.full(len(customers), np.iinfo(np.int64).min)
+        np.minimum.at(first, inverse, ts)
+        np.maximum.at(last, inverse, ts)
+
+        new = self.frequency[customers] == 0
+        self.first_ts[customers[new]] = first[new]
+        self.cohort[customers[new]] = month
+        self.last_ts[customers] = np.maximum(self.last_ts[customers], last)
+        self.frequency[customers] += orders
+        self.monetary[customers] += spent
+
+        # every active customer counts once in (cohort, months since first purchase)
+        cohorts = self.cohort[customers] - self.first_month
+        np.add.at(self.retention, (cohorts, month - self.cohort[customers]), 1)
+        return len(slots)
+
+    def update(self, runner, through=None, verbose=False):
+        """Fold in every month after the last processed one, up to `through`.
+
+        `through` defaults to, and is capped at, the last complete month in the
+        database, so a month is folded only once all of its orders exist.
+        """
+        _columns, rows = runner.fetch('order_month_range')
+        db_first, db_last = rows[0]
+        if db_first is None:
+            return []
+        last_complete = month_index(db_last) - 1
+        through = min(month_index(through), last_complete) if through else last_complete
+        start = self.last_month + 1 if self.last_month is not None else month_index(db_first)
+        folded = []
+        for month in range(start, through + 1):
+            start_date, end_date = month_bounds(month)
+            _columns, orders = runner.fetch('customer_orders_between', start_date=start_date, end_date=end_date)
+            customer_ids, purchased_at, values = zip(*orders) if orders else ((), (), ())
+            self.fold_month(month, list(customer_ids), list(purchased_at), [float(v) for v in values])
+            folded.append((month_label(month), len(orders)))
+            if verbose:
+                print(f"Folded {month_label(month)}: {len(orders)} orders")
+        return folded
+
+    # ------------------ Persistence ------------------
+    def save(self, path=STATE_PATH):
+        """Write the state atomically: a temporary file replaces the old one."""
+        import numpy as np
+        path = state_file(path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        n = len(self.ids)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(
+                f,
+                ids=np.array(self.ids, dtype=str),
+                first_ts=self.first_ts[:n], last_ts=self.last_ts[:n],
+                frequency=self.frequency[:n], monetary=self.monetary[:n], cohort=self.cohort[:n],
+                retention=self.retention,
+                months=np.array([-1 if self.first_month is None else self.first_month,
+                                 -1 if self.last_month is None else self.last_month]),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        """Load saved state, or return an empty engine if there is none yet."""
+        import numpy as np
+        engine = cls()
+        path = state_file(path)
+        if not os.path.exists(path):
+            return engine
+        with np.load(path) as data:
+            engine.ids = data['ids'].tolist()
+            engine.index = {cid: i for i, cid in enumerate(engine.ids)}
+            for name in ('first_ts', 'last_ts', 'frequency', 'monetary', 'cohort', 'retention'):
+                setattr(engine, name, data[name].copy())
+            first, last = data['months'].tolist()
+        engine.first_month = None if first < 0 else first
+        engine.last_month = None if last < 0 else last
+        return engine
+
+    # ------------------ Reports ------------------
+    def rfm_frame(self):
+        """One row per customer: recency (days), frequency, monetary and 1-5 scores.
+
+        Recency is measured from the end of the last folded month; scores are
+        quintiles (5 = most recent / most orders / highest spend).
+        """
+        import numpy as np
+        import pandas as pd
+        n = len(self.ids)
+        if n == 0:
+            return pd.DataFrame(columns=['customer_unique_id', 'recency_days', 'frequency', 'monetary',
+                                         'cohort', 'r_score', 'f_score', 'm_score', 'rfm_segment'])
+        as_of = np.datetime64(month_bounds(self.last_month)[1]).astype('datetime64[s]').astype(np.int64)
+        recency = (as_of - self.last_ts[:n]) / 86400.0
+        frequency = self.frequency[:n]
+        monetary = self.monetary[:n]
+        df = pd.DataFrame({
+            'customer_unique_id': self.ids,
+            'recency_days': recency.round(1),
+            'frequency': frequency,
+            'monetary': monetary.round(2),
+            'cohort': [month_label(c) for c in self.cohort[:n]],
+            'r_score': 6 - _quintile(recency),
+            'f_score': _quintile(frequency),
+            'm_score': _quintile(monetary),
+        })
+        df['rfm_segment'] = df['r_score'].astype(str) + df['f_score'].astype(str) + df['m_score'].astype(str)
+        return df
+
+    def retention_frame(self, as_share=True):
+        """Cohort (first-purchase month) x months since first purchase."""
+        import pandas as pd
+        if self.first_month is None:
+            return pd.DataFrame()
+        cohorts = [month_label(self.first_month + c) for c in range(self.retention.shape[0])]
+        df = pd.DataFrame(self.retention, index=cohorts, columns=range(self.retention.shape[1]))
+        sizes = df[0]
+        if as_share:
+            df = df.div(sizes.where(sizes > 0), axis=0).round(4)
+        df.insert(0, 'customers', sizes)
+        return df.rename_axis('cohort')
+
+
+def _quintile(values):
+    """1-5 score by quintile of `values` (ties share a score)."""
+    import numpy as np
+    edges = np.quantile(values, [0.2, 0.4, 0.6, 0.8])
+    return 1 + np.searchsorted(edges, values, side='left')
+
+
+# ------------------ Pipelines ------------------
+def refresh(runner, path=STATE_PATH, through=None, verbose=False):
+    """Load saved state, fold in new months, save, and return the engine."""
+    engine = CustomerAnalytics.load(path)
+    if engine.update(runner, through, verbose=verbose):
+        engine.save(path)
+    return engine
+
+
+def excel_frames(runner):
+    """Sheets for export_to_excel.py."""
+    engine = refresh(runner)
+    return {
+        'Customer RFM': engine.rfm_frame(),
+        'Cohort Retention': engine.retention_frame().reset_index(),
+    }
+
+
+def retention_heatmap(runner, show=True):
+    """Cohort retention heatmap (charts/cohort_retention_heatmap.png)."""
+    import matplotlib.pyplot as plt
+    from visualisations import save_chart
+    df = refresh(runner).retention_frame().drop(columns='customers', errors='ignore')
+    if df.shape[1] < 2:
+        print("Cohort retention needs at least two folded months; run `customers update` later.", file=sys.stderr)
+        return None
+
+    fig, ax = plt.subplots(figsize=(14, 9))
+    # month 0 is 100% by definition; start the colour scale at month 1
+    image = ax.imshow(df.iloc[:, 1:].values * 100, aspect='auto', cmap='viridis')
+    ax.set_xticks(range(len(df.columns) - 1))
+    ax.set_xticklabels(df.columns[1:])
+    ax.set_yticks(range(len(df.index)))
+    ax.set_yticklabels(df.index)
+    fig.colorbar(image, ax=ax, label='Returning customers (%)')
+    ax.set_title('Cohort Retention by First-Purchase Month', fontsize=16, pad=20)
+    ax.set_xlabel('Months Since First Purchase', fontsize=12)
+    ax.set_ylabel('Cohort', fontsize=12)
+    return save_chart(plt, 'cohort_retention_heatmap.png', show)
+
+
+def self_check(months=6, customers=300, orders_per_month=400, seed=0):
+    """Fold random orders month by month (saving and reloading the state between
+    months) and compare with a one-shot computation over the same orders.
+
+    Returns a list of mismatch descriptions (empty if the state agrees).
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    first = month_index('2017-01')
+    batches = []
+    for month in range(first, first + months):
+        start = np.datetime64(month_bounds(month)[0]).astype('datetime64[s]').astype(np.int64)
+        end = np.datetime64(month_bounds(month)[1]).astype('datetime64[s]').astype(np.int64)
+        n = rng.integers(0, orders_per_month) if month != first + 2 else 0  # include an empty month
+        batches.append((month,
+                        [f"c{i}" for i in rng.integers(0, customers, n)],
+                        rng.integers(start, end, n).astype('datetime64[s]'),
+                        rng.gamma(2.0, 80.0, n).round(2)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'state.npz')
+        for month, ids, ts, values in batches:
+            engine = CustomerAnalytics.load(path)
+            engine.fold_month(month, ids, ts, values)
+            engine.save(path)
+        engine = CustomerAnalytics.load(path)
+
+    # one-shot reference over all orders
+    ids = [cid for _, batch_ids, _, _ in batches for cid in batch_ids]
+    ts = np.concatenate([b[2] for b in batches]).astype(np.int64)
+    values = np.concatenate([b[3] for b in batches])
+    months_of = np.concatenate([np.full(len(b[1]), b[0]) for b in batches])
+    expected = {}
+    for cid in sorted(set(ids)):
+        mask = np.array([i == cid for i in ids])
+        first_ts = ts[mask].min()
+        cohort = months_of[mask][ts[mask].argmin()]
+        active = sorted(set(months_of[mask].tolist()))
+        expected[cid] = (first_ts, ts[mask].max(), mask.sum(), values[mask].sum(), cohort, active)
+    retention = np.zeros((months, months), dtype=np.int64)
+    for _first_ts, _last, _n, _total, cohort, active in expected.values():
+        for month in active:
+            retention[cohort - first, month - cohort] += 1
+
+    problems = []
+    if len(engine) != len(expected):
+        problems.append(f"customers: {len(engine)} != {len(expected)}")
+    for cid, (first_ts, last_ts, frequency, monetary, cohort, _active) in expected.items():
+        slot = engine.index.get(cid)
+        if slot is None:
+            problems.append(f"{cid}: missing")
+            continue
+        got = (engine.first_ts[slot], engine.last_ts[slot], engine.frequency[slot], engine.cohort[slot])
+        if got != (first_ts, last_ts, frequency, cohort) or not np.isclose(engine.monetary[slot], monetary):
+            problems.append(f"{cid}: {got + (engine.monetary[slot],)} != "
+                            f"{(first_ts, last_ts, frequency, cohort, monetary)}")
+    if engine.retention.shape != retention.shape or (engine.retention != retention).any():
+        problems.append("retention matrix differs")
+    if (engine.first_month, engine.last_month) != (first, first + months - 1):
+        problems.append(f"months: {engine.first_month}-{engine.last_month}")
+    return problems
+
+
+def parse_month(text):
+    """argparse type for YYYY-MM."""
+    year, sep, mon = text.partition('-')
+    if not (sep and len(year) == 4 and year.isdigit() and mon.isdigit() and 1 <= int(mon) <= 12):
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got {text!r}")
+    return f"{year}-{int(mon):02d}"
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Customer RFM and cohort retention.")
+    parser.add_argument('action', choices=['update', 'rfm', 'retention', 'check'])
+    parser.add_argument('--through', type=parse_month, metavar='YYYY-MM', help="last month to fold in (default: last complete month)")
+    parser.add_argument('--state', default=STATE_PATH, help=f"state file (default: {STATE_PATH})")
+    parser.add_argument('--limit', type=int, default=20, help="rows of RFM output")
+    parser.add_argument('-f', '--format', choices=['table', 'csv'], default='table')
+    return parser
+
+
+def run(args):
+    if args.action == 'check':
+        problems = self_check()
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        print("Incremental state matches the one-shot fold" if not problems
+              else f"{len(problems)} mismatches between incremental and one-shot folds")
+        return 1 if problems else 0
+    with QueryRunner() as runner:
+        engine = refresh(runner, args.state, args.through, verbose=True)
+    if args.action == 'update':
+        print(f"State through {month_label(engine.last_month) if engine.last_month is not None else '-'}: "
+              f"{len(engine)} customers")
+        return 0
+    if args.action == 'rfm':
+        df = engine.rfm_frame().sort_values('monetary', ascending=False).head(args.limit)
+    else:
+        df = engine.retention_frame().reset_index()
+    print(df.to_csv(index=False) if args.format == 'csv' else df.to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run(build_parser().parse_args()))
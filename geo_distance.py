@@ -0,0 +1,204 @@
+"""
+Seller -> Customer Distances
+Relates freight and delivery delay to shipping distance.
+
+The geolocation table (~1M rows) is collapsed in SQL to one centroid per zip
+code prefix. Centroids are kept in arrays sorted by prefix, so every seller and
+customer prefix is resolved with one vectorized binary search (no spatial index
+is needed: the lookups are by prefix, never by coordinates). Haversine
+distances for all order items are then computed with numpy in batches instead
+of a per-row SQL join. Items whose prefix has no centroid, even within the same
+3-digit zip sector, are left out of the aggregates.
+
+Usage:
+    python geo_distance.py
+    python geo_distance.py --format csv
+"""
+
+import argparse
+import sys
+import time
+
+from query_registry import QueryRunner
+
+# numpy / pandas are imported inside the functions (see cli.py: importing the
+# report modules must stay cheap).
+
+EARTH_RADIUS_KM = 6371.0088
+
+DISTANCE_BANDS_KM = [0, 100, 300, 600, 1000, 1500, 2000, 3000, float('inf')]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; works element-wise on numpy arrays."""
+    import numpy as np
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+# ------------------ Centroid index ------------------
+class CentroidIndex:
+    """Zip-prefix centroids with O(log n) vectorized lookup by prefix."""
+
+    def __init__(self, prefixes, lats, lons):
+        import numpy as np
+        order = np.argsort(np.asarray(prefixes, dtype=np.int64))
+        self.prefixes = np.asarray(prefixes, dtype=np.int64)[order]
+        self.lats = np.asarray(lats, dtype=float)[order]
+        self.lons = np.asarray(lons, dtype=float)[order]
+
+    @classmethod
+    def from_db(cls, runner):
+        _columns, rows = runner.fetch('geolocation_centroids')
+        prefixes, lats, lons = zip(*rows) if rows else ((), (), ())
+        return cls(prefixes, lats, lons)
+
+    def __len__(self):
+        return len(self.prefixes)
+
+    def lookup(self, prefixes, fallback=True):
+        """Vectorized centroid lookup; returns (lats, lons, found mask).
+
+        `found` marks exact matches. With fallback=True a prefix missing from
+        geolocation takes the centroid of the numerically closest known prefix
+        in the same 3-digit zip sector (prefix // 100). Prefixes with no such
+        centroid get NaN coordinates.
+        """
+        import numpy as np
+        query = np.asarray(prefixes, dtype=np.int64)
+        if len(self.prefixes) == 0:
+            nan = np.full(len(query), np.nan)
+            return nan, nan.copy(), np.zeros(len(query), dtype=bool)
+        pos = np.clip(np.searchsorted(self.prefixes, query), 0, len(self.prefixes) - 1)
+        found = self.prefixes[pos] == query
+        ok = found
+        if fallback:
+            # closest of the two neighbouring known prefixes within the sector
+            left = np.maximum(pos - 1, 0)
+            sector = query // 100
+            d_left = np.where(self.prefixes[left] // 100 == sector, np.abs(self.prefixes[left] - query), np.inf)
+            d_right = np.where(self.prefixes[pos] // 100 == sector, np.abs(self.prefixes[pos] - query), np.inf)
+            pos = np.where(~found & (d_left < d_right), left, pos)
+            ok = found | np.isfinite(np.minimum(d_left, d_right))
+        lats = np.where(ok, self.lats[pos], np.nan)
+        lons = np.where(ok, self.lons[pos], np.nan)
+        return lats, lons, found
+
+
+# ------------------ Distances ------------------
+def item_distances(index, seller_prefixes, customer_prefixes, batch_size=500000):
+    """Seller -> customer distance (km) for every order item, in numpy batches.
+
+    NaN where either prefix has no centroid (see CentroidIndex.lookup).
+    """
+    import numpy as np
+    seller_prefixes = np.asarray(seller_prefixes, dtype=np.int64)
+    customer_prefixes = np.asarray(customer_prefixes, dtype=np.int64)
+    km = np.empty(len(seller_prefixes))
+    for start in range(0, len(km), batch_size):
+        stop = start + batch_size
+        s_lat, s_lon, _ = index.lookup(seller_prefixes[start:stop])
+        c_lat, c_lon, _ = index.lookup(customer_prefixes[start:stop])
+        km[start:stop] = haversine_km(s_lat, s_lon, c_lat, c_lon)
+    return km
+
+
+def load_items(runner):
+    """Order items as a DataFrame: seller/customer prefix, state, freight, delay."""
+    import pandas as pd
+    df = runner.fetch_df('order_item_locations')
+    df['freight_value'] = df['freight_value'].astype(float)
+    df['delay_days'] = pd.to_numeric(df['delay_days'], errors='coerce').astype(float)
+    return df
+
+
+def add_distances(df, index, batch_size=500000):
+    """Add distance_km and drop the items it cannot be computed for."""
+    df['distance_km'] = item_distances(index, df['seller_zip_prefix'], df['customer_zip_prefix'], batch_size)
+    return df[df['distance_km'].notna()].reset_index(drop=True)
+
+
+# ------------------ Aggregates ------------------
+def state_aggregates(df):
+    """Freight-per-km and delay-vs-distance per customer state.
+
+    freight_per_km is total freight / total distance (robust to near-zero
+    distances; NaN when the total is 0); delay_distance_corr is Pearson's r over delivered items.
+    """
+    import numpy as np
+    delivered = df['delay_days'].notna()
+    x = df['distance_km'].where(delivered)
+    y = df['delay_days']
+    parts = df.assign(x=x, y=y, xx=x * x, yy=y * y, xy=x * y, delivered=delivered)
+    g = parts.groupby('customer_state')
+    sums = g[['x', 'y', 'xx', 'yy', 'xy', 'delivered']].sum()
+    n = sums['delivered']
+    cov = sums['xy'] - sums['x'] * sums['y'] / n
+    var_x = sums['xx'] - sums['x'] ** 2 / n
+    var_y = sums['yy'] - sums['y'] ** 2 / n
+
+    result = g.agg(items=('distance_km', 'size'),
+                   avg_distance_km=('distance_km', 'mean'),
+                   median_distance_km=('distance_km', 'median'),
+                   total_freight=('freight_value', 'sum'),
+                   total_km=('distance_km', 'sum'),
+                   avg_delay_days=('delay_days', 'mean'))
+    result['freight_per_km'] = result['total_freight'] / result['total_km'].where(result['total_km'] > 0)
+    result['delay_distance_corr'] = cov / np.sqrt(var_x * var_y)
+    result = result.drop(columns=['total_freight', 'total_km'])
+    return result.sort_values('items', ascending=False).reset_index()
+
+
+def distance_bands(df, bands=DISTANCE_BANDS_KM):
+    """Items, average freight and delay per distance band, all states together."""
+    import pandas as pd
+    band = pd.cut(df['distance_km'], bands, right=False)
+    g = df.groupby(band, observed=True)
+    result = g.agg(items=('distance_km', 'size'),
+                   avg_freight=('freight_value', 'mean'),
+                   avg_delay_days=('delay_days', 'mean'),
+                   late_share=('delay_days', lambda d: (d > 0).sum() / max(d.notna().sum(), 1)))
+    result.index = [f"{b.left:g}-{b.right:g} km" for b in result.index]
+    return result.rename_axis('distance_band').reset_index()
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Freight and delivery delay vs seller-customer distance.")
+    parser.add_argument('-f', '--format', choices=['table', 'csv'], default='table')
+    parser.add_argument('--batch-size', type=int, default=500000)
+    return parser
+
+
+def run(args):
+    with QueryRunner() as runner:
+        start = time.perf_counter()
+        index = CentroidIndex.from_db(runner)
+        df = load_items(runner)
+        loaded = time.perf_counter()
+
+    _, _, seller_found = index.lookup(df['seller_zip_prefix'], fallback=False)
+    _, _, customer_found = index.lookup(df['customer_zip_prefix'], fallback=False)
+    total = len(df)
+    df = add_distances(df, index, args.batch_size)
+    computed = time.perf_counter()
+
+    for title, table in [("Freight and delay vs distance by customer state", state_aggregates(df)),
+                         ("Distance bands", distance_bands(df))]:
+        if args.format == 'csv':
+            print(f"# {title}")
+            print(table.to_csv(index=False), end='')
+        else:
+            print(f"\n--- {title} ---")
+            print(table.to_string(index=False))
+
+    print(f"\n{len(index)} prefix centroids, {len(df)} of {total} order items located "
+          f"({(~seller_found).sum()} seller / {(~customer_found).sum()} customer prefixes not in geolocation: "
+          f"same-sector fallback or dropped)",
+          file=sys.stderr)
+    print(f"Load {loaded - start:.2f}s, distances {computed - loaded:.3f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run(build_parser().parse_args()))
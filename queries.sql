@@ -1,18 +1,28 @@
--- 1. Select first 10 rows from customers
-SELECT * 
+-- Generated by query_registry.py --dump-sql; edit the registry, not this file.
+
+-- Indexes (query_registry.py --create-indexes)
+CREATE INDEX IF NOT EXISTS orders_purchase_timestamp_idx ON orders (order_purchase_timestamp);
+
+-- First customers
+PREPARE q_sample_customers (int) AS
+SELECT *
 FROM customers
-LIMIT 10;
+LIMIT $1;
+EXECUTE q_sample_customers (10);
 
--- 2. Filter orders with total price > 100 and sort by purchase date
+-- Orders with total price above threshold
+PREPARE q_orders_above_total (numeric, int) AS
 SELECT o.order_id, o.customer_id, SUM(oi.price) AS total_price, o.order_purchase_timestamp
 FROM orders o
 JOIN order_items oi ON o.order_id = oi.order_id
 GROUP BY o.order_id, o.customer_id, o.order_purchase_timestamp
-HAVING SUM(oi.price) > 100
+HAVING SUM(oi.price) > $1
 ORDER BY o.order_purchase_timestamp DESC
-LIMIT 10;
+LIMIT $2;
+EXECUTE q_orders_above_total (100, 10);
 
--- 3. Aggregation: total orders, average, min, max price per customer
+-- Total orders, avg, min, max price per customer
+PREPARE q_price_stats_per_customer (int) AS
 SELECT o.customer_id,
        COUNT(oi.order_id) AS total_orders,
        AVG(oi.price) AS avg_price,
@@ -22,25 +32,30 @@ FROM orders o
 JOIN order_items oi ON o.order_id = oi.order_id
 GROUP BY o.customer_id
 ORDER BY total_orders DESC
-LIMIT 10;
+LIMIT $1;
+EXECUTE q_price_stats_per_customer (10);
 
--- 4. Join: get customer city and total spent per customer
+-- Customer city and total spent per customer
+PREPARE q_total_spent_per_customer (int) AS
 SELECT c.customer_id, c.customer_city, SUM(oi.price) AS total_spent
 FROM customers c
 JOIN orders o ON c.customer_id = o.customer_id
 JOIN order_items oi ON o.order_id = oi.order_id
 GROUP BY c.customer_id, c.customer_city
 ORDER BY total_spent DESC
-LIMIT 10;
-
+LIMIT $1;
+EXECUTE q_total_spent_per_customer (10);
 
--- 1. Count how many customers are from each state
+-- Customers count per state
+PREPARE q_customers_per_state AS
 SELECT customer_state, COUNT(*) AS total_customers
 FROM customers
 GROUP BY customer_state
 ORDER BY total_customers DESC;
+EXECUTE q_customers_per_state;
 
--- 2. Find average order value per customer (only those with more than 5 orders)
+-- Average order value per customer (>N orders)
+PREPARE q_avg_order_value_per_customer (int) AS
 SELECT c.customer_id,
        COUNT(o.order_id) AS total_orders,
        AVG(oi.price) AS avg_order_value
@@ -48,10 +63,12 @@ FROM customers c
 JOIN orders o ON c.customer_id = o.customer_id
 JOIN order_items oi ON o.order_id = oi.order_id
 GROUP BY c.customer_id
-HAVING COUNT(o.order_id) > 5
+HAVING COUNT(o.order_id) > $1
 ORDER BY avg_order_value DESC;
+EXECUTE q_avg_order_value_per_customer (5);
 
--- 3. Find top product categories by number of orders
+-- Top product categories by number of orders
+PREPARE q_top_categories_by_orders (int) AS
 SELECT p.product_category_name,
        COUNT(DISTINCT o.order_id) AS total_orders,
        AVG(oi.price) AS avg_price
@@ -60,9 +77,11 @@ JOIN order_items oi ON p.product_id = oi.product_id
 JOIN orders o ON oi.order_id = o.order_id
 GROUP BY p.product_category_name
 ORDER BY total_orders DESC
-LIMIT 10;
+LIMIT $1;
+EXECUTE q_top_categories_by_orders (10);
 
--- 4. Aggregation: average, min, max freight per seller
+-- Avg, min, max freight per seller
+PREPARE q_freight_per_seller (int) AS
 SELECT seller_id,
        AVG(freight_value) AS avg_freight,
        MIN(freight_value) AS min_freight,
@@ -70,9 +89,11 @@ SELECT seller_id,
 FROM order_items
 GROUP BY seller_id
 ORDER BY avg_freight DESC
-LIMIT 10;
+LIMIT $1;
+EXECUTE q_freight_per_seller (10);
 
--- 5. Join customers and orders, count items per customer (filter > 5)
+-- Items per customer (>N)
+PREPARE q_items_per_customer (int, int) AS
 SELECT c.customer_id,
        c.customer_city,
        COUNT(oi.order_id) AS total_items
@@ -80,11 +101,13 @@ FROM customers c
 JOIN orders o ON c.customer_id = o.customer_id
 JOIN order_items oi ON o.order_id = oi.order_id
 GROUP BY c.customer_id, c.customer_city
-HAVING COUNT(oi.order_id) > 5
+HAVING COUNT(oi.order_id) > $1
 ORDER BY total_items DESC
-LIMIT 10;
+LIMIT $2;
+EXECUTE q_items_per_customer (5, 10);
 
--- 6. Find orders delivered late and calculate delay in days
+-- Orders delivered late
+PREPARE q_late_deliveries (int) AS
 SELECT order_id,
        order_status,
        order_purchase_timestamp,
@@ -94,9 +117,11 @@ SELECT order_id,
 FROM orders
 WHERE CAST(order_delivered_customer_date AS timestamp) > CAST(order_estimated_delivery_date AS timestamp)
 ORDER BY delay_days DESC
-LIMIT 10;
+LIMIT $1;
+EXECUTE q_late_deliveries (10);
 
--- 7. Average, minimum, and maximum product price per seller
+-- Product price stats per seller
+PREPARE q_price_stats_per_seller (int) AS
 SELECT s.seller_id,
        COUNT(oi.product_id) AS total_products_sold,
        AVG(oi.price) AS avg_price,
@@ -106,9 +131,11 @@ FROM order_items oi
 JOIN sellers s ON oi.seller_id = s.seller_id
 GROUP BY s.seller_id
 ORDER BY avg_price DESC
-LIMIT 10;
+LIMIT $1;
+EXECUTE q_price_stats_per_seller (10);
 
--- 8. Total payment value by state
+-- Total payment by state
+PREPARE q_payments_by_state AS
 SELECT c.customer_state,
        COUNT(p.payment_value) AS num_payments,
        SUM(p.payment_value::numeric) AS total_payment,
@@ -118,8 +145,10 @@ JOIN customers c ON o.customer_id = c.customer_id
 JOIN payments p ON o.order_id = p.order_id
 GROUP BY c.customer_state
 ORDER BY total_payment DESC;
+EXECUTE q_payments_by_state;
 
--- 9. Top 10 product categories by total sales value
+-- Top product categories by total sales
+PREPARE q_top_categories_by_sales (int) AS
 SELECT p.product_category_name,
        SUM(oi.price::numeric) AS total_sales,
        COUNT(oi.order_id) AS total_orders
@@ -127,18 +156,173 @@ FROM order_items oi
 JOIN products p ON oi.product_id = p.product_id
 GROUP BY p.product_category_name
 ORDER BY total_sales DESC
-LIMIT 10;
+LIMIT $1;
+EXECUTE q_top_categories_by_sales (10);
 
--- 10. Average review score per product
-SELECT 
-    oi.product_id,
-    p.product_category_name,
-    AVG(r.review_score) AS avg_review_score
+-- Average review score per product
+PREPARE q_avg_review_per_product (int) AS
+SELECT oi.product_id,
+       p.product_category_name,
+       AVG(r.review_score) AS avg_review_score
 FROM reviews r
 JOIN orders o ON r.order_id = o.order_id
 JOIN order_items oi ON o.order_id = oi.order_id
 JOIN products p ON oi.product_id = p.product_id
 GROUP BY oi.product_id, p.product_category_name
 ORDER BY avg_review_score DESC
-LIMIT 10;
+LIMIT $1;
+EXECUTE q_avg_review_per_product (10);
+
+-- Top sellers by number of orders
+PREPARE q_top_sellers (int) AS
+SELECT s.seller_id, s.seller_city, COUNT(oi.order_id) AS orders_count
+FROM sellers s
+JOIN order_items oi ON s.seller_id = oi.seller_id
+JOIN orders o ON oi.order_id = o.order_id
+GROUP BY s.seller_id, s.seller_city
+ORDER BY orders_count DESC
+LIMIT $1;
+EXECUTE q_top_sellers (5);
+
+-- Top product categories by units sold
+PREPARE q_top_categories_by_units (int) AS
+SELECT ct.product_category_name_english AS category, SUM(oi.order_item_id) AS units_sold
+FROM order_items oi
+JOIN products p ON oi.product_id = p.product_id
+JOIN category_translation ct ON p.product_category_name = ct.product_category_name
+GROUP BY ct.product_category_name_english
+ORDER BY units_sold DESC
+LIMIT $1;
+EXECUTE q_top_categories_by_units (10);
+
+-- Top Brazilian states by total seller sales
+PREPARE q_top_states_by_sales (int) AS
+SELECT g.geolocation_state AS state, SUM(p.payment_value) AS total_sales
+FROM orders o
+JOIN order_items oi ON o.order_id = oi.order_id
+JOIN payments p ON o.order_id = p.order_id
+JOIN sellers s ON oi.seller_id = s.seller_id
+JOIN geolocation g ON s.seller_zip_code_prefix = g.geolocation_zip_code_prefix
+GROUP BY g.geolocation_state
+ORDER BY total_sales DESC
+LIMIT $1;
+EXECUTE q_top_states_by_sales (10);
+
+-- Daily sales per product category
+PREPARE q_sales_by_department (date, date) AS
+SELECT o.order_purchase_timestamp::date AS date,
+       p.product_category_name,
+       SUM(oi.price * oi.order_item_id) AS sales
+FROM orders o
+JOIN order_items oi ON o.order_id = oi.order_id
+JOIN products p ON oi.product_id = p.product_id
+WHERE o.order_purchase_timestamp::date >= COALESCE($1, '-infinity'::date)
+  AND o.order_purchase_timestamp::date <= COALESCE($2, 'infinity'::date)
+GROUP BY date, p.product_category_name
+ORDER BY date;
+EXECUTE q_sales_by_department (NULL::date, NULL::date);
+
+-- Payment value sample
+PREPARE q_payment_values (int) AS
+SELECT p.payment_value
+FROM payments p
+JOIN orders o ON p.order_id = o.order_id
+JOIN order_items oi ON o.order_id = oi.order_id
+WHERE p.payment_value IS NOT NULL
+LIMIT $1;
+EXECUTE q_payment_values (5000);
+
+-- States: orders vs sales
+PREPARE q_state_orders_sales AS
+SELECT g.geolocation_state AS state,
+       COUNT(DISTINCT o.order_id) AS total_orders,
+       SUM(p.payment_value) AS total_sales,
+       AVG(p.payment_value) AS avg_order_value
+FROM orders o
+JOIN order_items oi ON o.order_id = oi.order_id
+JOIN payments p ON o.order_id = p.order_id
+JOIN sellers s ON oi.seller_id = s.seller_id
+JOIN geolocation g ON s.seller_zip_code_prefix = g.geolocation_zip_code_prefix
+GROUP BY g.geolocation_state;
+EXECUTE q_state_orders_sales;
+
+-- Centroid per zip code prefix (internal input, not executed here)
+PREPARE q_geolocation_centroids AS
+SELECT geolocation_zip_code_prefix::int AS zip_prefix,
+       AVG(geolocation_lat) AS lat,
+       AVG(geolocation_lng) AS lon
+FROM geolocation
+WHERE geolocation_lat BETWEEN -34 AND 6
+  AND geolocation_lng BETWEEN -74 AND -34
+GROUP BY geolocation_zip_code_prefix;
+
+-- Seller and customer zip prefix per order item (internal input, not executed here)
+PREPARE q_order_item_locations AS
+SELECT s.seller_zip_code_prefix::int AS seller_zip_prefix,
+       c.customer_zip_code_prefix::int AS customer_zip_prefix,
+       c.customer_state,
+       oi.freight_value,
+       EXTRACT(EPOCH FROM (CAST(o.order_delivered_customer_date AS timestamp)
+                           - CAST(o.order_estimated_delivery_date AS timestamp))) / 86400 AS delay_days
+FROM order_items oi
+JOIN orders o ON oi.order_id = o.order_id
+JOIN sellers s ON oi.seller_id = s.seller_id
+JOIN customers c ON o.customer_id = c.customer_id;
+
+-- First and last month with orders (internal input, not executed here)
+PREPARE q_order_month_range AS
+SELECT to_char((SELECT order_purchase_timestamp FROM orders
+                WHERE order_purchase_timestamp IS NOT NULL
+                ORDER BY order_purchase_timestamp LIMIT 1)::timestamp, 'YYYY-MM') AS first_month,
+       to_char((SELECT order_purchase_timestamp FROM orders
+                WHERE order_purchase_timestamp IS NOT NULL
+                ORDER BY order_purchase_timestamp DESC LIMIT 1)::timestamp, 'YYYY-MM') AS last_month;
+
+-- Orders per unique customer in a date range (internal input, not executed here)
+PREPARE q_customer_orders_between (text, text) AS
+WITH month_orders AS (
+    SELECT order_id, customer_id, order_purchase_timestamp
+    FROM orders
+    WHERE order_purchase_timestamp >= $1
+      AND order_purchase_timestamp < $2
+), order_payments AS (
+    SELECT p.order_id, SUM(p.payment_value) AS order_value
+    FROM payments p
+    JOIN month_orders m ON p.order_id = m.order_id
+    GROUP BY p.order_id
+)
+SELECT c.customer_unique_id,
+       m.order_purchase_timestamp::timestamp AS purchased_at,
+       COALESCE(op.order_value, 0) AS order_value
+FROM month_orders m
+JOIN customers c ON m.customer_id = c.customer_id
+LEFT JOIN order_payments op ON m.order_id = op.order_id;
+
+-- Sampled item count and price total per category and order (internal input, not executed here)
+PREPARE q_top_categories_by_orders_sample (numeric, int) AS
+SELECT p.product_category_name, o.order_id, COUNT(oi.price) AS n_rows, SUM(oi.price) AS total
+FROM orders o TABLESAMPLE BERNOULLI ($1) REPEATABLE ($2)
+JOIN order_items oi ON o.order_id = oi.order_id
+JOIN products p ON oi.product_id = p.product_id
+GROUP BY p.product_category_name, o.order_id;
+
+-- Sampled payment count and total per state and order (internal input, not executed here)
+PREPARE q_payments_by_state_sample (numeric, int) AS
+SELECT c.customer_state, o.order_id,
+       COUNT(p.payment_value) AS n_rows, SUM(p.payment_value::numeric) AS total
+FROM orders o TABLESAMPLE BERNOULLI ($1) REPEATABLE ($2)
+JOIN customers c ON o.customer_id = c.customer_id
+JOIN payments p ON o.order_id = p.order_id
+GROUP BY c.customer_state, o.order_id;
+
+-- Sampled joined-row count and payment total per seller state and order (internal input, not executed here)
+PREPARE q_state_orders_sales_sample (numeric, int) AS
+SELECT g.geolocation_state AS state, o.order_id,
+       COUNT(p.payment_value) AS n_rows, SUM(p.payment_value) AS total
+FROM orders o TABLESAMPLE BERNOULLI ($1) REPEATABLE ($2)
+JOIN order_items oi ON o.order_id = oi.order_id
+JOIN payments p ON o.order_id = p.order_id
+JOIN sellers s ON oi.seller_id = s.seller_id
+JOIN geolocation g ON s.seller_zip_code_prefix = g.geolocation_zip_code_prefix
+GROUP BY g.geolocation_state, o.order_id;
 
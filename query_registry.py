@@ -0,0 +1,590 @@
+"""
+Query Registry
+Named, parameterized SQL queries for the Olist database, executed as
+server-side prepared statements (PREPARE / EXECUTE).
+
+Usage:
+    python query_registry.py --list
+    python query_registry.py top_sellers late_deliveries --param limit=3 --format csv
+    python query_registry.py --dump-sql > queries.sql
+    python query_registry.py --create-indexes
+"""
+
+import argparse
+import csv
+import json
+import sys
+import textwrap
+from collections import namedtuple
+
+# ------------------ PostgreSQL Connection ------------------
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'olist',
+    'user': 'postgres',
+    'password': '7777',
+}
+
+# name: parameter name used in the SQL ($1, $2, ... follow the tuple order)
+# type: PostgreSQL type declared in PREPARE
+Param = namedtuple('Param', ['name', 'type', 'default'])
+# internal: input of another module (geo_distance.py, customer_analytics.py,
+# approximate.py) rather than a report; not run by default nor EXECUTEd in queries.sql
+Query = namedtuple('Query', ['name', 'title', 'sql', 'params', 'internal'])
+
+_PY_TYPES = {'int': int, 'numeric': float, 'date': str, 'text': str}
+
+
+def _q(name, title, sql, *params, internal=False):
+    return Query(name, title, textwrap.dedent(sql).strip(), tuple(params), internal)
+
+
+LIMIT_10 = Param('limit', 'int', 10)
+SAMPLE_PCT = Param('pct', 'numeric', 1.0)
+SAMPLE_SEED = Param('seed', 'int', 42)
+
+# ------------------ Indexes ------------------
+# Indexes the queries below rely on; created by --create-indexes (IF NOT EXISTS).
+INDEXES = {
+    # month range and month-by-month reads of customer_analytics.py
+    'orders_purchase_timestamp_idx': "CREATE INDEX IF NOT EXISTS orders_purchase_timestamp_idx "
+                                     "ON orders (order_purchase_timestamp)",
+}
+
+# ------------------ Queries ------------------
+QUERIES = {q.name: q for q in [
+    _q('sample_customers', 'First customers', """
+        SELECT *
+        FROM customers
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('orders_above_total', 'Orders with total price above threshold', """
+        SELECT o.order_id, o.customer_id, SUM(oi.price) AS total_price, o.order_purchase_timestamp
+        FROM orders o
+        JOIN order_items oi ON o.order_id = oi.order_id
+        GROUP BY o.order_id, o.customer_id, o.order_purchase_timestamp
+        HAVING SUM(oi.price) > $1
+        ORDER BY o.order_purchase_timestamp DESC
+        LIMIT $2
+    """, Param('min_total', 'numeric', 100), LIMIT_10),
+
+    _q('price_stats_per_customer', 'Total orders, avg, min, max price per customer', """
+        SELECT o.customer_id,
+               COUNT(oi.order_id) AS total_orders,
+               AVG(oi.price) AS avg_price,
+               MIN(oi.price) AS min_price,
+               MAX(oi.price) AS max_price
+        FROM orders o
+        JOIN order_items oi ON o.order_id = oi.order_id
+        GROUP BY o.customer_id
+        ORDER BY total_orders DESC
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('total_spent_per_customer', 'Customer city and total spent per customer', """
+        SELECT c.customer_id, c.customer_city, SUM(oi.price) AS total_spent
+        FROM customers c
+        JOIN orders o ON c.customer_id = o.customer_id
+        JOIN order_items oi ON o.order_id = oi.order_id
+        GROUP BY c.customer_id, c.customer_city
+        ORDER BY total_spent DESC
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('customers_per_state', 'Customers count per state', """
+        SELECT customer_state, COUNT(*) AS total_customers
+        FROM customers
+        GROUP BY customer_state
+        ORDER BY total_customers DESC
+    """),
+
+    _q('avg_order_value_per_customer', 'Average order value per customer (>N orders)', """
+        SELECT c.customer_id,
+               COUNT(o.order_id) AS total_orders,
+               AVG(oi.price) AS avg_order_value
+        FROM customers c
+        JOIN orders o ON c.customer_id = o.customer_id
+        JOIN order_items oi ON o.order_id = oi.order_id
+        GROUP BY c.customer_id
+        HAVING COUNT(o.order_id) > $1
+        ORDER BY avg_order_value DESC
+    """, Param('min_orders', 'int', 5)),
+
+    _q('top_categories_by_orders', 'Top product categories by number of orders', """
+        SELECT p.product_category_name,
+               COUNT(DISTINCT o.order_id) AS total_orders,
+               AVG(oi.price) AS avg_price
+        FROM products p
+        JOIN order_items oi ON p.product_id = oi.product_id
+        JOIN orders o ON oi.order_id = o.order_id
+        GROUP BY p.product_category_name
+        ORDER BY total_orders DESC
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('freight_per_seller', 'Avg, min, max freight per seller', """
+        SELECT seller_id,
+               AVG(freight_value) AS avg_freight,
+               MIN(freight_value) AS min_freight,
+               MAX(freight_value) AS max_freight
+        FROM order_items
+        GROUP BY seller_id
+        ORDER BY avg_freight DESC
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('items_per_customer', 'Items per customer (>N)', """
+        SELECT c.customer_id,
+               c.customer_city,
+               COUNT(oi.order_id) AS total_items
+        FROM customers c
+        JOIN orders o ON c.customer_id = o.customer_id
+        JOIN order_items oi ON o.order_id = oi.order_id
+        GROUP BY c.customer_id, c.customer_city
+        HAVING COUNT(oi.order_id) > $1
+        ORDER BY total_items DESC
+        LIMIT $2
+    """, Param('min_items', 'int', 5), LIMIT_10),
+
+    _q('late_deliveries', 'Orders delivered late', """
+        SELECT order_id,
+               order_status,
+               order_purchase_timestamp,
+               order_delivered_customer_date,
+               order_estimated_delivery_date,
+               (CAST(order_delivered_customer_date AS timestamp) - CAST(order_estimated_delivery_date AS timestamp)) AS delay_days
+        FROM orders
+        WHERE CAST(order_delivered_customer_date AS timestamp) > CAST(order_estimated_delivery_date AS timestamp)
+        ORDER BY delay_days DESC
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('price_stats_per_seller', 'Product price stats per seller', """
+        SELECT s.seller_id,
+               COUNT(oi.product_id) AS total_products_sold,
+               AVG(oi.price) AS avg_price,
+               MIN(oi.price) AS min_price,
+               MAX(oi.price) AS max_price
+        FROM order_items oi
+        JOIN sellers s ON oi.seller_id = s.seller_id
+        GROUP BY s.seller_id
+        ORDER BY avg_price DESC
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('payments_by_state', 'Total payment by state', """
+        SELECT c.customer_state,
+               COUNT(p.payment_value) AS num_payments,
+               SUM(p.payment_value::numeric) AS total_payment,
+               AVG(p.payment_value::numeric) AS avg_payment
+        FROM orders o
+        JOIN customers c ON o.customer_id = c.customer_id
+        JOIN payments p ON o.order_id = p.order_id
+        GROUP BY c.customer_state
+        ORDER BY total_payment DESC
+    """),
+
+    _q('top_categories_by_sales', 'Top product categories by total sales', """
+        SELECT p.product_category_name,
+               SUM(oi.price::numeric) AS total_sales,
+               COUNT(oi.order_id) AS total_orders
+        FROM order_items oi
+        JOIN products p ON oi.product_id = p.product_id
+        GROUP BY p.product_category_name
+        ORDER BY total_sales DESC
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('avg_review_per_product', 'Average review score per product', """
+        SELECT oi.product_id,
+               p.product_category_name,
+               AVG(r.review_score) AS avg_review_score
+        FROM reviews r
+        JOIN orders o ON r.order_id = o.order_id
+        JOIN order_items oi ON o.order_id = oi.order_id
+        JOIN products p ON oi.product_id = p.product_id
+        GROUP BY oi.product_id, p.product_category_name
+        ORDER BY avg_review_score DESC
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('top_sellers', 'Top sellers by number of orders', """
+        SELECT s.seller_id, s.seller_city, COUNT(oi.order_id) AS orders_count
+        FROM sellers s
+        JOIN order_items oi ON s.seller_id = oi.seller_id
+        JOIN orders o ON oi.order_id = o.order_id
+        GROUP BY s.seller_id, s.seller_city
+        ORDER BY orders_count DESC
+        LIMIT $1
+    """, Param('limit', 'int', 5)),
+
+    _q('top_categories_by_units', 'Top product categories by units sold', """
+        SELECT ct.product_category_name_english AS category, SUM(oi.order_item_id) AS units_sold
+        FROM order_items oi
+        JOIN products p ON oi.product_id = p.product_id
+        JOIN category_translation ct ON p.product_category_name = ct.product_category_name
+        GROUP BY ct.product_category_name_english
+        ORDER BY units_sold DESC
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('top_states_by_sales', 'Top Brazilian states by total seller sales', """
+        SELECT g.geolocation_state AS state, SUM(p.payment_value) AS total_sales
+        FROM orders o
+        JOIN order_items oi ON o.order_id = oi.order_id
+        JOIN payments p ON o.order_id = p.order_id
+        JOIN sellers s ON oi.seller_id = s.seller_id
+        JOIN geolocation g ON s.seller_zip_code_prefix = g.geolocation_zip_code_prefix
+        GROUP BY g.geolocation_state
+        ORDER BY total_sales DESC
+        LIMIT $1
+    """, LIMIT_10),
+
+    _q('sales_by_department', 'Daily sales per product category', """
+        SELECT o.order_purchase_timestamp::date AS date,
+               p.product_category_name,
+               SUM(oi.price * oi.order_item_id) AS sales
+        FROM orders o
+        JOIN order_items oi ON o.order_id = oi.order_id
+        JOIN products p ON oi.product_id = p.product_id
+        WHERE o.order_purchase_timestamp::date >= COALESCE($1, '-infinity'::date)
+          AND o.order_purchase_timestamp::date <= COALESCE($2, 'infinity'::date)
+        GROUP BY date, p.product_category_name
+        ORDER BY date
+    """, Param('start_date', 'date', None), Param('end_date', 'date', None)),
+
+    _q('payment_values', 'Payment value sample', """
+        SELECT p.payment_value
+        FROM payments p
+        JOIN orders o ON p.order_id = o.order_id
+        JOIN order_items oi ON o.order_id = oi.order_id
+        WHERE p.payment_value IS NOT NULL
+        LIMIT $1
+    """, Param('limit', 'int', 5000)),
+
+    _q('state_orders_sales', 'States: orders vs sales', """
+        SELECT g.geolocation_state AS state,
+               COUNT(DISTINCT o.order_id) AS total_orders,
+               SUM(p.payment_value) AS total_sales,
+               AVG(p.payment_value) AS avg_order_value
+        FROM orders o
+        JOIN order_items oi ON o.order_id = oi.order_id
+        JOIN payments p ON o.order_id = p.order_id
+        JOIN sellers s ON oi.seller_id = s.seller_id
+        JOIN geolocation g ON s.seller_zip_code_prefix = g.geolocation_zip_code_prefix
+        GROUP BY g.geolocation_state
+    """),
+
+    # ------------------ Inputs for geo_distance.py ------------------
+    # Points outside Brazil's bounding box are bad geocodes in the Olist data.
+    _q('geolocation_centroids', 'Centroid per zip code prefix', """
+        SELECT geolocation_zip_code_prefix::int AS zip_prefix,
+               AVG(geolocation_lat) AS lat,
+               AVG(geolocation_lng) AS lon
+        FROM geolocation
+        WHERE geolocation_lat BETWEEN -34 AND 6
+          AND geolocation_lng BETWEEN -74 AND -34
+        GROUP BY geolocation_zip_code_prefix
+    """, internal=True),
+
+    _q('order_item_locations', 'Seller and customer zip prefix per order item', """
+        SELECT s.seller_zip_code_prefix::int AS seller_zip_prefix,
+               c.customer_zip_code_prefix::int AS customer_zip_prefix,
+               c.customer_state,
+               oi.freight_value,
+               EXTRACT(EPOCH FROM (CAST(o.order_delivered_customer_date AS timestamp)
+                                   - CAST(o.order_estimated_delivery_date AS timestamp))) / 86400 AS delay_days
+        FROM order_items oi
+        JOIN orders o ON oi.order_id = o.order_id
+        JOIN sellers s ON oi.seller_id = s.seller_id
+        JOIN customers c ON o.customer_id = c.customer_id
+    """, internal=True),
+
+    # ------------------ Inputs for customer_analytics.py ------------------
+    # order_purchase_timestamp is ISO text ('YYYY-MM-DD HH:MM:SS'), which sorts
+    # like the timestamp it holds, so both queries compare the raw column and can
+    # use orders_purchase_timestamp_idx (see INDEXES).
+    _q('order_month_range', 'First and last month with orders', """
+        SELECT to_char((SELECT order_purchase_timestamp FROM orders
+                        WHERE order_purchase_timestamp IS NOT NULL
+                        ORDER BY order_purchase_timestamp LIMIT 1)::timestamp, 'YYYY-MM') AS first_month,
+               to_char((SELECT order_purchase_timestamp FROM orders
+                        WHERE order_purchase_timestamp IS NOT NULL
+                        ORDER BY order_purchase_timestamp DESC LIMIT 1)::timestamp, 'YYYY-MM') AS last_month
+    """, internal=True),
+
+    _q('customer_orders_between', 'Orders per unique customer in a date range', """
+        WITH month_orders AS (
+            SELECT order_id, customer_id, order_purchase_timestamp
+            FROM orders
+            WHERE order_purchase_timestamp >= $1
+              AND order_purchase_timestamp < $2
+        ), order_payments AS (
+            SELECT p.order_id, SUM(p.payment_value) AS order_value
+            FROM payments p
+            JOIN month_orders m ON p.order_id = m.order_id
+            GROUP BY p.order_id
+        )
+        SELECT c.customer_unique_id,
+               m.order_purchase_timestamp::timestamp AS purchased_at,
+               COALESCE(op.order_value, 0) AS order_value
+        FROM month_orders m
+        JOIN customers c ON m.customer_id = c.customer_id
+        LEFT JOIN order_payments op ON m.order_id = op.order_id
+    """, Param('start_date', 'text', None), Param('end_date', 'text', None), internal=True),
+
+    # ------------------ Sampled rows for approximate.py ------------------
+    # Whole orders are sampled (TABLESAMPLE on orders), so every item/payment of
+    # a sampled order is kept and distinct-order counts scale by 1 / rate. Rows
+    # are collapsed per group and order, the unit approximate.py's bounds use.
+    _q('top_categories_by_orders_sample', 'Sampled item count and price total per category and order', """
+        SELECT p.product_category_name, o.order_id, COUNT(oi.price) AS n_rows, SUM(oi.price) AS total
+        FROM orders o TABLESAMPLE BERNOULLI ($1) REPEATABLE ($2)
+        JOIN order_items oi ON o.order_id = oi.order_id
+        JOIN products p ON oi.product_id = p.product_id
+        GROUP BY p.product_category_name, o.order_id
+    """, SAMPLE_PCT, SAMPLE_SEED, internal=True),
+
+    _q('payments_by_state_sample', 'Sampled payment count and total per state and order', """
+        SELECT c.customer_state, o.order_id,
+               COUNT(p.payment_value) AS n_rows, SUM(p.payment_value::numeric) AS total
+        FROM orders o TABLESAMPLE BERNOULLI ($1) REPEATABLE ($2)
+        JOIN customers c ON o.customer_id = c.customer_id
+        JOIN payments p ON o.order_id = p.order_id
+        GROUP BY c.customer_state, o.order_id
+    """, SAMPLE_PCT, SAMPLE_SEED, internal=True),
+
+    _q('state_orders_sales_sample', 'Sampled joined-row count and payment total per seller state and order', """
+        SELECT g.geolocation_state AS state, o.order_id,
+               COUNT(p.payment_value) AS n_rows, SUM(p.payment_value) AS total
+        FROM orders o TABLESAMPLE BERNOULLI ($1) REPEATABLE ($2)
+        JOIN order_items oi ON o.order_id = oi.order_id
+        JOIN payments p ON o.order_id = p.order_id
+        JOIN sellers s ON oi.seller_id = s.seller_id
+        JOIN geolocation g ON s.seller_zip_code_prefix = g.geolocation_zip_code_prefix
+        GROUP BY g.geolocation_state, o.order_id
+    """, SAMPLE_PCT, SAMPLE_SEED, internal=True),
+]}
+
+
+def connect():
+    import psycopg2
+    return psycopg2.connect(**DB_CONFIG)
+
+
+def bind_params(query, params):
+    """Return the EXECUTE argument list for `query`, filling in defaults."""
+    unknown = set(params) - {p.name for p in query.params}
+    if unknown:
+        raise ValueError(f"{query.name}: unknown parameter(s) {', '.join(sorted(unknown))}")
+    values = []
+    for p in query.params:
+        value = params.get(p.name, p.default)
+        if value is not None and not isinstance(value, _PY_TYPES[p.type]):
+            value = _PY_TYPES[p.type](value)
+        values.append(value)
+    return values
+
+
+class QueryRunner:
+    """Runs registry queries on one connection, preparing each statement once."""
+
+    def __init__(self, conn=None):
+        self.conn = conn if conn is not None else connect()
+        self.cur = self.conn.cursor()
+        self.prepared = set()
+
+    def prepare(self, name):
+        if name in self.prepared:
+            return
+        query = QUERIES[name]
+        types = f" ({', '.join(p.type for p in query.params)})" if query.params else ""
+        self.cur.execute(f"PREPARE q_{name}{types} AS {query.sql}")
+        self.prepared.add(name)
+
+    def _execute(self, name, params):
+        values = bind_params(QUERIES[name], params)
+        self.prepare(name)
+        if values:
+            placeholders = ', '.join(['%s'] * len(values))
+            self.cur.execute(f"EXECUTE q_{name} ({placeholders})", values)
+        else:
+            self.cur.execute(f"EXECUTE q_{name}")
+        return [d[0] for d in self.cur.description]
+
+    def fetch(self, name, **params):
+        """Execute a registry query; returns (column names, rows)."""
+        columns = self._execute(name, params)
+        return columns, self.cur.fetchall()
+
+    def stream(self, name, batch_size=10000, **params):
+        """Like fetch(), but yields rows in batches instead of one list."""
+        self._execute(name, params)
+        while True:
+            rows = self.cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def fetch_df(self, name, **params):
+        import pandas as pd
+        columns, rows = self.fetch(name, **params)
+        # coerce_float turns NUMERIC (Decimal) columns into floats, as pd.read_sql does
+        return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+    def create_indexes(self, names=None):
+        """Create the registry's INDEXES that do not exist yet."""
+        for name in names or INDEXES:
+            self.cur.execute(INDEXES[name])
+        self.conn.commit()
+
+    def close(self):
+        self.cur.close()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ------------------ SQL dump (queries.sql) ------------------
+def _sql_literal(value, pg_type):
+    if value is None:
+        return f"NULL::{pg_type}"
+    if pg_type in ('date', 'text'):
+        return f"'{value}'"
+    return str(value)
+
+
+def dump_sql(names=None):
+    """Render the registry as a psql script of PREPARE / EXECUTE statements."""
+    out = ["-- Generated by query_registry.py --dump-sql; edit the registry, not this file.\n"]
+    out.append("-- Indexes (query_registry.py --create-indexes)")
+    out.extend(f"{ddl};" for ddl in INDEXES.values())
+    out.append("")
+    for name in names or QUERIES:
+        query = QUERIES[name]
+        types = f" ({', '.join(p.type for p in query.params)})" if query.params else ""
+        out.append(f"-- {query.title}" + (" (internal input, not executed here)" if query.internal else ""))
+        out.append(f"PREPARE q_{name}{types} AS\n{query.sql};")
+        if query.internal:
+            out.append("")
+        elif query.params:
+            args = ', '.join(_sql_literal(p.default, p.type) for p in query.params)
+            out.append(f"EXECUTE q_{name} ({args});\n")
+        else:
+            out.append(f"EXECUTE q_{name};\n")
+    return "\n".join(out)
+
+
+# ------------------ Output ------------------
+def _write_table(name, columns, rows, out):
+    out.write(f"\n--- {QUERIES[name].title} ---\n")
+    for row in rows:
+        out.write(f"{row}\n")
+
+
+def _write_csv(name, columns, rows, out):
+    out.write(f"# {name}\n")
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    writer.writerows(rows)
+
+
+def write_results(results, fmt, out=sys.stdout):
+    """results: list of (name, columns, rows)."""
+    if fmt == 'json':
+        payload = {name: [dict(zip(columns, row)) for row in rows] for name, columns, rows in results}
+        json.dump(payload, out, indent=2, default=str)
+        out.write("\n")
+        return
+    writer = _write_csv if fmt == 'csv' else _write_table
+    for name, columns, rows in results:
+        writer(name, columns, rows, out)
+
+
+def parse_param(text):
+    name, sep, value = text.partition('=')
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+    return name, value
+
+
+def split_params(names, params):
+    """Route --param values to the selected queries that declare them."""
+    per_query = {name: {} for name in names}
+    for key, value in params:
+        targets = [n for n in names if any(p.name == key for p in QUERIES[n].params)]
+        if not targets:
+            raise ValueError(f"no selected query takes parameter {key!r}")
+        for n in targets:
+            per_query[n][key] = value
+    return per_query
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Run named queries from the registry.")
+    parser.add_argument('names', nargs='*', help="query names to run (default: all but internal ones)")
+    parser.add_argument('-p', '--param', action='append', type=parse_param, default=[],
+                        metavar='NAME=VALUE', help="query parameter, e.g. limit=5 (repeatable)")
+    parser.add_argument('-f', '--format', choices=['table', 'csv', 'json'], default='table')
+    parser.add_argument('--approx', type=float, metavar='PCT',
+                        help="answer queries that support it from a PCT%% sample of orders (see approximate.py)")
+    parser.add_argument('--list', action='store_true', help="list available queries and exit")
+    parser.add_argument('--dump-sql', action='store_true', help="print the registry as a psql script and exit")
+    parser.add_argument('--create-indexes', action='store_true', help="create the indexes the queries rely on and exit")
+    return parser
+
+
+def run(args):
+    if args.list:
+        for q in QUERIES.values():
+            params = ', '.join(f"{p.name}={p.default}" for p in q.params)
+            print(f"{q.name:30} {q.title}" + (f"  [{params}]" if params else "")
+                  + ("  (internal)" if q.internal else ""))
+        return 0
+    names = args.names or [name for name, q in QUERIES.items() if not q.internal]
+    unknown = [n for n in names if n not in QUERIES]
+    if unknown:
+        print(f"Unknown query: {', '.join(unknown)} (see --list)", file=sys.stderr)
+        return 2
+    if args.dump_sql:
+        print(dump_sql(args.names or None))
+        return 0
+    if args.create_indexes:
+        with QueryRunner() as runner:
+            runner.create_indexes()
+        print(f"Indexes ensured: {', '.join(INDEXES)}")
+        return 0
+    try:
+        per_query = split_params(names, args.param)
+        for name in names:
+            bind_params(QUERIES[name], per_query[name])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if args.approx is not None:
+        from approximate import APPROXIMATE, approximate
+        if not 0 < args.approx <= 100:
+            print("Error: --approx must be in (0, 100]", file=sys.stderr)
+            return 2
+
+    with QueryRunner() as runner:
+        results = []
+        for name in names:
+            if args.approx is not None and name in APPROXIMATE:
+                limit = per_query[name].get('limit')
+                results.append((name, *approximate(runner, name, args.approx,
+                                                   limit=int(limit) if limit else None)))
+            else:
+                results.append((name, *runner.fetch(name, **per_query[name])))
+    write_results(results, args.format)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run(build_parser().parse_args()))
@@ -0,0 +1,400 @@
+"""
+Recording Rule Generator
+Finds the expensive PromQL in the Grafana dashboards and moves it into
+Prometheus recording rules, so panels read precomputed series instead of
+re-evaluating rates and aggregations on every refresh.
+
+Two kinds of rules are generated:
+  * range functions, e.g. rate(m{...}[5m]) -> m:rate5m. The rule is recorded
+    for all series of `m` and the panel keeps its label matchers (including
+    Grafana variables such as $database), so every panel sharing the same
+    function, metric and range reuses one rule.
+  * template-free aggregations, e.g. the cache-hit ratio, recorded whole as
+    dashboard:<panel title>.
+
+A candidate is only recorded when it saves more samples per second than it
+costs, at the expected dashboard refresh rate (--refresh-seconds); ranges of
+an hour or more are evaluated in a slower group (LONG_INTERVAL).
+
+Usage:
+    python recording_rules.py
+    python recording_rules.py --prometheus http://localhost:9090   # real series counts
+    python recording_rules.py --refresh-seconds 10 --dry-run       # cost report only
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+
+DASHBOARDS = ['node_exporter.json', 'database_exporter.json', 'custom_exporter.json']
+RULES_FILE = 'dashboard_recording_rules.yml'
+OUT_DIR = 'recorded_dashboards'
+PROMETHEUS_CONFIG = 'prometheus.yml'
+
+RANGE_FUNCTIONS = ['rate', 'irate', 'increase', 'delta', 'idelta', 'deriv', 'changes', 'resets',
+                   'avg_over_time', 'min_over_time', 'max_over_time', 'sum_over_time',
+                   'count_over_time', 'stddev_over_time', 'stdvar_over_time', 'last_over_time']
+
+# fn(metric{matchers}[range]) with a fixed range (not $__interval / $__rate_interval)
+RANGE_CALL = re.compile(
+    r'\b(?P<fn>' + '|'.join(RANGE_FUNCTIONS) + r')\s*\(\s*'
+    r'(?P<metric>[a-zA-Z_:][a-zA-Z0-9_:]*)\s*'
+    r'(?P<matchers>\{[^}]*\})?\s*'
+    r'\[(?P<range>\d+[smhdwy])\]\s*\)'
+)
+AGGREGATION = re.compile(r'\b(sum|avg|min|max|count|stddev|stdvar|group|topk|bottomk|quantile)\s*(\(|by\b|without\b)')
+# identifiers not followed by "(" are series selectors once matchers, ranges and
+# grouping labels are stripped (see selector_names)
+IDENTIFIER = re.compile(r'\b([a-zA-Z_:][a-zA-Z0-9_:]*)\b(?!\s*\()')
+KEYWORDS = {'by', 'without', 'on', 'ignoring', 'group_left', 'group_right', 'bool', 'offset', 'and', 'or', 'unless'}
+
+Rule = namedtuple('Rule', ['record', 'expr', 'kind', 'metric', 'range'])
+# matchers: the label filter the panel applies to the recorded series ('' if none)
+Use = namedtuple('Use', ['dashboard', 'panel', 'rule', 'matchers'])
+
+# rules over ranges of at least LONG_RANGE_SECONDS go to a group evaluated every
+# LONG_INTERVAL: a 24h window barely moves in 15s
+LONG_RANGE_SECONDS = 3600
+LONG_INTERVAL = '5m'
+# expected seconds between refreshes of a dashboard while someone watches it
+# (the dashboards ship with auto-refresh off; Grafana offers 5s-1d)
+REFRESH_SECONDS = 30
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'y': 31536000}
+
+
+def duration_seconds(text):
+    return int(text[:-1]) * _UNITS[text[-1]]
+
+
+def global_interval(key, config_path=PROMETHEUS_CONFIG):
+    """global.<key> (scrape_interval / evaluation_interval) from prometheus.yml, default 1m."""
+    try:
+        with open(config_path, encoding='utf-8') as f:
+            match = re.search(rf'^\s+{key}:\s*(\d+[smhdwy])', f.read(), re.M)
+    except OSError:
+        match = None
+    return duration_seconds(match.group(1)) if match else 60
+
+
+# ------------------ Dashboard parsing ------------------
+def iter_queries(dashboard):
+    """Yield (panel title, query spec dict) for every PromQL query in a dashboard.
+
+    Handles the Grafana v2 resource format (spec.elements) used by the exports in
+    this repo and the classic format (panels[].targets[]).
+    """
+    spec = dashboard.get('spec', dashboard)
+    for element in spec.get('elements', {}).values():
+        panel = element.get('spec', {})
+        for query in panel.get('data', {}).get('spec', {}).get('queries', []):
+            data_query = query.get('spec', {}).get('query', {})
+            if data_query.get('group') == 'prometheus' and data_query.get('spec', {}).get('expr'):
+                yield panel.get('title', ''), data_query['spec']
+    for panel in spec.get('panels', []):
+        for target in panel.get('targets', []):
+            if target.get('expr'):
+                yield panel.get('title', ''), target
+
+
+def normalize(expr):
+    return ' '.join(expr.split())
+
+
+def selector_names(expr):
+    """Metric (or recorded series) names an expression selects."""
+    expr = re.sub(r'\{[^}]*\}|\[[^\]]*\]', '', expr)
+    expr = re.sub(r'\b(by|without|on|ignoring|group_left|group_right)\s*\([^)]*\)', '', expr)
+    return [name for name in IDENTIFIER.findall(expr) if name not in KEYWORDS]
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_') or 'panel'
+
+
+# ------------------ Rule extraction ------------------
+class RuleSet:
+    """Rules extracted from the dashboards.
+
+    allowed=None registers every candidate rule. Otherwise only the keys in
+    `allowed` (range rule names and (dashboard, panel) pairs of aggregations,
+    see rule_key) are recorded and every other expression is left as it is.
+    """
+
+    def __init__(self, allowed=None):
+        self.rules = {}      # record name -> Rule
+        self.by_expr = {}    # recorded expression -> record name
+        self.uses = []
+        self.panels = {}     # aggregation record name -> (dashboard, panel)
+        self.allowed = allowed
+
+    def _add(self, record, expr, kind, metric=None, range_=None):
+        if expr in self.by_expr:
+            return self.by_expr[expr]
+        base, n = record, 2
+        while record in self.rules:
+            record, n = f"{base}_{n}", n + 1
+        self.rules[record] = Rule(record, expr, kind, metric, range_)
+        self.by_expr[expr] = record
+        return record
+
+    def rewrite(self, dashboard_name, panel_title, expr):
+        """Return `expr` rewritten to use recorded series, registering the rules it needs."""
+        expr = normalize(expr)
+
+        range_uses = []
+
+        def replace(match):
+            fn, metric, rng = match.group('fn'), match.group('metric'), match.group('range')
+            if self.allowed is not None and f"{metric}:{fn}{rng}" not in self.allowed:
+                return match.group(0)
+            record = self._add(f"{metric}:{fn}{rng}", f"{fn}({metric}[{rng}])", 'range', metric, rng)
+            range_uses.append(Use(dashboard_name, panel_title, record, match.group('matchers') or ''))
+            return record + (match.group('matchers') or '')
+
+        rewritten = RANGE_CALL.sub(replace, expr)
+        if ('$' not in rewritten and AGGREGATION.search(rewritten)
+                and (self.allowed is None or (dashboard_name, panel_title) in self.allowed)):
+            # the panel reads only the aggregation; its range series are read by the rule
+            record = self._add(f"dashboard:{_slug(panel_title)}", rewritten, 'aggregation')
+            self.panels.setdefault(record, (dashboard_name, panel_title))
+            self.uses.append(Use(dashboard_name, panel_title, record, ''))
+            return record
+        self.uses.extend(range_uses)
+        return rewritten
+
+    def ordered(self):
+        # range rules first: aggregation rules may read them, and rules in one
+        # group are evaluated in order
+        return sorted(self.rules.values(), key=lambda r: r.kind != 'range')
+
+    def rule_key(self, rule):
+        """Key of `rule` in `allowed`: stable across RuleSets built from the same dashboards."""
+        return rule.record if rule.kind == 'range' else self.panels[rule.record]
+
+    def interval(self, rule, eval_seconds):
+        """Evaluation interval (s) of a rule: long ranges are recomputed less often."""
+        ranges = [m.group('range') for m in RANGE_CALL.finditer(rule.expr)]
+        ranges += [self.rules[name].range for name in selector_names(rule.expr)
+                   if name in self.rules and self.rules[name].kind == 'range']
+        if any(duration_seconds(r) >= LONG_RANGE_SECONDS for r in ranges):
+            return max(eval_seconds, duration_seconds(LONG_INTERVAL))
+        return eval_seconds
+
+
+def process_dashboards(paths, rules):
+    """Rewrite every dashboard in memory; returns {path: rewritten dashboard}."""
+    rewritten = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            dashboard = json.load(f)
+        name = dashboard.get('spec', dashboard).get('title', os.path.basename(path))
+        for panel_title, query in iter_queries(dashboard):
+            new_expr = rules.rewrite(name, panel_title, query['expr'])
+            if new_expr != normalize(query['expr']):
+                query['expr'] = new_expr
+        rewritten[path] = dashboard
+    return rewritten
+
+
+# ------------------ Output ------------------
+def render_rules(rules, eval_seconds):
+    # double-quoted YAML scalars accept JSON string escapes, so no YAML library is needed
+    lines = ["# Generated by recording_rules.py from the Grafana dashboards; do not edit by hand.",
+             "groups:"]
+    groups = {}
+    for rule in rules.ordered():
+        groups.setdefault(rules.interval(rule, eval_seconds), []).append(rule)
+    for interval, group in sorted(groups.items()):
+        if interval == eval_seconds:
+            lines.append("  - name: dashboards")
+        else:
+            lines.append(f"  - name: dashboards_{interval}s")
+            lines.append(f"    interval: {interval}s")
+        lines.append("    rules:")
+        for rule in group:
+            lines.append(f"      - record: {rule.record}")
+            lines.append(f"        expr: {json.dumps(rule.expr)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_dashboards(rewritten, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for path, dashboard in rewritten.items():
+        out_path = os.path.join(out_dir, os.path.basename(path))
+        with open(out_path, 'w', encoding='utf-8') as f:
+            json.dump(dashboard, f, indent=2, ensure_ascii=False)
+        paths.append(out_path)
+    return paths
+
+
+# ------------------ Cost report ------------------
+def series_counts(metrics, prometheus_url):
+    """Current number of series per metric, asked from Prometheus (None if unreachable)."""
+    counts = {}
+    for metric in metrics:
+        url = f"{prometheus_url.rstrip('/')}/api/v1/query?" + urllib.parse.urlencode({'query': f"count({metric})"})
+        try:
+            with urllib.request.urlopen(url, timeout=5) as resp:
+                result = json.load(resp)['data']['result']
+            counts[metric] = int(float(result[0]['value'][1])) if result else 0
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+    return counts
+
+
+Cost = namedtuple('Cost', ['uses', 'before', 'after', 'per_eval', 'interval'])
+
+
+def rule_costs(rules, scrape_seconds, eval_seconds, counts=None, recorded=None):
+    """Cost per candidate rule: samples read per refresh before/after, and per evaluation.
+
+    A range function reads series * range / scrape_interval samples each time it
+    is evaluated; an instant selector reads one sample per series. Panels pay
+    this on every refresh before recording and read one sample per recorded
+    series after. The rule pays it once per interval whether or not a dashboard
+    is open. `recorded` is the set of range rules an aggregation can read
+    (default: all); the others it evaluates itself.
+    """
+    def series(name):
+        rule = rules.rules.get(name)
+        metric = rule.metric if rule is not None and rule.kind == 'range' else name
+        return counts.get(metric, 1) if counts else 1
+
+    def range_reads(rule):
+        return series(rule.metric) * max(1, duration_seconds(rule.range) // scrape_seconds)
+
+    def reads(expr, recorded):
+        total = 0
+        for name in selector_names(expr):
+            rule = rules.rules.get(name)
+            if rule is not None and rule.kind == 'range' and (recorded is None or name not in recorded):
+                total += range_reads(rule)
+            else:
+                total += series(name)
+        return total
+
+    n_uses = {}
+    for use in rules.uses:
+        n_uses[use.rule] = n_uses.get(use.rule, 0) + 1
+
+    costs = {}
+    for rule in rules.ordered():
+        n = n_uses.get(rule.record, 0)
+        if rule.kind == 'range':
+            before, after, per_eval = n * range_reads(rule), n * series(rule.metric), range_reads(rule)
+        else:
+            # an aggregation records its result; it is counted as one series
+            before, after, per_eval = n * reads(rule.expr, set()), n, reads(rule.expr, recorded)
+        costs[rule.record] = Cost(n, before, after, per_eval, rules.interval(rule, eval_seconds))
+    return costs
+
+
+def select_rules(rules, scrape_seconds, eval_seconds, refresh_seconds, counts=None):
+    """Keep the rules that save more samples per second than they cost.
+
+    A rule saves (before - after) samples every refresh_seconds and costs
+    per_eval samples every interval. Range rules are decided first; the
+    aggregations are then costed against the range rules actually kept.
+    Returns (allowed keys for RuleSet, {record: Cost}, set of kept records).
+    """
+    def pays(cost):
+        return (cost.before - cost.after) / refresh_seconds > cost.per_eval / cost.interval
+
+    costs = rule_costs(rules, scrape_seconds, eval_seconds, counts)
+    kept = {r.record for r in rules.rules.values() if r.kind == 'range' and pays(costs[r.record])}
+    costs = rule_costs(rules, scrape_seconds, eval_seconds, counts, recorded=kept)
+    kept |= {r.record for r in rules.rules.values() if r.kind != 'range' and pays(costs[r.record])}
+    allowed = {rules.rule_key(rules.rules[record]) for record in kept}
+    return allowed, costs, kept
+
+
+def cost_report(rules, costs, kept, refresh_seconds, counts=None, out=sys.stdout):
+    """Per-candidate costs and the totals for the rules kept."""
+    out.write(f"{'rule':48} {'uses':>4} {'series':>7} {'before/refresh':>15} {'after':>6} "
+              f"{'rule/eval':>10} {'every':>6}  recorded\n")
+    before_total = after_total = 0
+    standing = 0.0
+    for rule in rules.ordered():
+        cost = costs[rule.record]
+        recorded = rule.record in kept
+        if recorded:
+            before_total += cost.before
+            after_total += cost.after
+            standing += cost.per_eval / cost.interval
+        shown = '-' if rule.kind != 'range' else (counts or {}).get(rule.metric, 1) if counts else '1*'
+        out.write(f"{rule.record:48} {cost.uses:4d} {shown:>7} {cost.before:15d} {cost.after:6d} "
+                  f"{cost.per_eval:10d} {f'{cost.interval}s':>6}  {'yes' if recorded else 'no'}\n")
+
+    saved = before_total - after_total
+    out.write(f"\nRecorded {len(kept)} of {len(rules.rules)} candidate rules: those saving more samples "
+              f"than they read, at one refresh per dashboard every {refresh_seconds}s (--refresh-seconds)\n")
+    out.write(f"Samples read per full dashboard refresh by the recorded panels: {before_total} -> {after_total} "
+              f"({saved} saved)\n")
+    out.write(f"Standing rule cost: {standing:.1f} samples/s, whether or not a dashboard is open\n")
+    if saved > 0:
+        out.write(f"Break-even: one full refresh every {saved / standing:.0f}s; "
+                  "less frequent refreshes cost more than they save\n" if standing else
+                  "Break-even: always (the recorded rules read nothing)\n")
+
+    filtered = [use for use in rules.uses if use.matchers]
+    if filtered:
+        example = next((use for use in filtered if '$' not in use.matchers), filtered[0])
+        out.write(f"{len(filtered)} of {len(rules.uses)} panel uses filter the series "
+                  f"(e.g. {example.matchers}); 'before' and 'after' assume every series of the "
+                  "metric is read, so they overstate those panels, while the rule cost is exact "
+                  "(rules record all series)\n")
+    if not counts:
+        out.write("* series counts unknown; figures are per series (use --prometheus URL for real counts)\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Prometheus recording rules from the Grafana dashboards.")
+    parser.add_argument('dashboards', nargs='*', default=DASHBOARDS, help="dashboard JSON files")
+    parser.add_argument('--rules', default=RULES_FILE, help=f"recording rules output (default: {RULES_FILE})")
+    parser.add_argument('--out-dir', default=OUT_DIR, help=f"rewritten dashboards directory (default: {OUT_DIR})")
+    parser.add_argument('--prometheus', metavar='URL', help="Prometheus server used to count series per metric")
+    parser.add_argument('--refresh-seconds', type=int, default=REFRESH_SECONDS,
+                        help=f"expected seconds between refreshes of a watched dashboard (default: {REFRESH_SECONDS})")
+    parser.add_argument('--dry-run', action='store_true', help="only print the cost report")
+    args = parser.parse_args(argv)
+
+    # first pass: every candidate rule, to cost them
+    rules = RuleSet()
+    process_dashboards(args.dashboards, rules)
+    scrape_seconds = global_interval('scrape_interval')
+    eval_seconds = global_interval('evaluation_interval')
+
+    counts = None
+    if args.prometheus:
+        metrics = {r.metric for r in rules.rules.values() if r.kind == 'range'}
+        metrics |= {name for r in rules.rules.values() if r.kind != 'range'
+                    for name in selector_names(r.expr) if name not in rules.rules}
+        metrics = sorted(metrics)
+        counts = series_counts(metrics, args.prometheus)
+        if counts is None:
+            print(f"Could not query {args.prometheus}; reporting per-series costs", file=sys.stderr)
+    allowed, costs, kept = select_rules(rules, scrape_seconds, eval_seconds, args.refresh_seconds, counts)
+    cost_report(rules, costs, kept, args.refresh_seconds, counts)
+
+    if args.dry_run:
+        return 0
+    # second pass: rewrite the dashboards with the rules worth recording only
+    selected = RuleSet(allowed)
+    rewritten = process_dashboards(args.dashboards, selected)
+    with open(args.rules, 'w', encoding='utf-8') as f:
+        f.write(render_rules(selected, eval_seconds))
+    print(f"\nRecording rules written: {args.rules} ({len(selected.rules)} rules)")
+    for path in write_dashboards(rewritten, args.out_dir):
+        print(f"Dashboard rewritten: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())